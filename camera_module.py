@@ -9,80 +9,734 @@ camera_module.py
 1）读取相机内参 json
 2）启动摄像头并以固定帧率输出图像
 3）进行简单去畸变
-4）提供迭代接口给其他模块调用
+4）后台线程采集，提供迭代接口给其他模块调用
 
 依赖：
 - OpenCV
 - config_loader.py
 """
 
+import os
 import cv2
+import copy
 import time
+import logging
+import functools
+import threading
 import numpy as np
-from config_loader import ConfigLoader
+from pathlib import Path
+from config_loader import get_loader
+
+try:
+    from picamera2 import Picamera2
+except ImportError:
+    # 仅 picamera2 后端需要
+    Picamera2 = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # 仅 undistort_mode="numba" 需要
+    njit = None
+
+
+logger = logging.getLogger(__name__)
+
+# 帧间隔节拍用粗粒度时钟（直接读内核 jiffies，分辨率 1~4 ms，
+# 对 66 ms 帧间隔足够）；非 Linux 平台退回 time.monotonic
+if hasattr(time, "CLOCK_MONOTONIC_COARSE"):
+    _coarse_now = functools.partial(time.clock_gettime,
+                                    time.CLOCK_MONOTONIC_COARSE)
+else:
+    _coarse_now = time.monotonic
+
+
+@functools.lru_cache(maxsize=8)
+def _load_intrinsics(config_path, mtime_ns):
+    """
+    读取相机内参并构造 K / dist（只读数组，可在多个实例间共享）
+    mtime_ns 仅作为缓存键，文件修改后重新读取
+    """
+    loader = get_loader(camera_json=config_path)
+    cam_cfg = loader.load_camera_params()
+
+    K = np.array([
+        [cam_cfg["fx"], 0, cam_cfg["cx"]],
+        [0, cam_cfg["fy"], cam_cfg["cy"]],
+        [0,    0,     1]
+    ], dtype=np.float64)
+    # 展平为一维连续数组，json 中写成嵌套列表也能直接传给 OpenCV
+    # K / dist 用 float64：calib3d 内部按双精度计算，避免隐式转换
+    dist = np.ascontiguousarray(
+        np.asarray(cam_cfg["dist"], dtype=np.float64).reshape(-1))
+
+    K.setflags(write=False)
+    dist.setflags(write=False)
+    return K, dist, cam_cfg
+
+
+def _aligned_empty(shape, dtype, align=64):
+    """
+    首地址按 align 字节（缓存行）对齐的 C 连续数组，
+    NEON 向量读写不会跨缓存行拆分
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = np.empty(nbytes + align, dtype=np.uint8)
+    offset = (-buf.ctypes.data) % align
+    return buf[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def _aligned_copy(arr, align=64):
+    out = _aligned_empty(arr.shape, arr.dtype, align)
+    np.copyto(out, arr)
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def _jpeg_codec_info():
+    """
+    从 OpenCV 编译信息中取出 JPEG 解码库一行，如 "build-libjpeg-turbo (2.1.3)"
+    """
+    for line in cv2.getBuildInformation().splitlines():
+        line = line.strip()
+        if line.startswith("JPEG:"):
+            return line[len("JPEG:"):].strip()
+    return ""
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _undistort_kernel(src, out, fx, fy, cx, cy, nfx, nfy, ncx, ncy,
+                          k1, k2, p1, p2, k3):
+        """
+        逐像素 Brown-Conrady 畸变模型 + 双线性采样，不读映射表
+        src / out 形状为 (h, w, c)；(nfx, nfy, ncx, ncy) 为输出相机内参
+        """
+        h, w, c = out.shape
+        sh, sw = src.shape[0], src.shape[1]
+        for v in prange(h):
+            y = (v - ncy) / nfy
+            for u in range(w):
+                x = (u - ncx) / nfx
+                r2 = x * x + y * y
+                radial = 1.0 + r2 * (k1 + r2 * (k2 + r2 * k3))
+                xd = x * radial + 2.0 * p1 * x * y + p2 * (r2 + 2.0 * x * x)
+                yd = y * radial + p1 * (r2 + 2.0 * y * y) + 2.0 * p2 * x * y
+                sx = fx * xd + cx
+                sy = fy * yd + cy
+
+                x0 = int(np.floor(sx))
+                y0 = int(np.floor(sy))
+                if x0 < 0 or y0 < 0 or x0 >= sw - 1 or y0 >= sh - 1:
+                    for ch in range(c):
+                        out[v, u, ch] = 0
+                    continue
+
+                ax = sx - x0
+                ay = sy - y0
+                for ch in range(c):
+                    top = src[y0, x0, ch] * (1.0 - ax) + src[y0, x0 + 1, ch] * ax
+                    bot = (src[y0 + 1, x0, ch] * (1.0 - ax)
+                           + src[y0 + 1, x0 + 1, ch] * ax)
+                    out[v, u, ch] = np.uint8(top * (1.0 - ay) + bot * ay + 0.5)
 
 
 class CameraModule:
-    def __init__(self, config_path="config/camera_intrinsics.json", target_fps=15):
-        loader = ConfigLoader(camera_json=config_path)
-        self.cam_cfg = loader.load_camera_params()
+    # remap 查表格式：CV_16SC2 整数坐标 + CV_16UC1 插值系数
+    # 640x480 下约 0.9 MB，比两张 CV_32FC1 浮点表（约 2.4 MB）少一半以上访存，
+    # 且 remap 在 ARM 上走 NEON 定点路径
+    MAP_TYPE = cv2.CV_16SC2
+
+    # 每次取帧前最多丢弃的积压帧数
+    MAX_DRAIN_FRAMES = 4
+    # grab 超过该耗时说明是阻塞等到的新帧，缓冲已清空
+    DRAIN_BLOCK_S = 0.005
+    # 统计线程输出帧率 / 丢帧的间隔（秒），仅 DEBUG 级别时启动
+    STATS_INTERVAL_S = 2.0
+    # 输出缓冲数（三缓冲）：采集写 1 个 + 最新待取 1 个 + 下游持有 1 个
+    OUT_BUFFERS = 3
+    # 采集线程绑定的 CPU 核与实时优先级（None 表示不绑定 / 不提权）
+    CAPTURE_CPU = 3
+    CAPTURE_RT_PRIORITY = 20
+    # 畸变系数绝对值都低于该值时视为无畸变，不做 remap
+    IDENTITY_DIST_EPS = 0.01
+
+    def __init__(self, config_path="config/camera_intrinsics.json", target_fps=15,
+                 gray=False, use_opencl=False, num_threads=4,
+                 undistort_mode="remap", enable_undistort=True):
+        """
+        gray=True 时全程只处理亮度单通道（二维码检测只需灰度），
+        采集 YUYV 直接取 Y 分量，remap 数据量降为 1/3
+        use_opencl=True 时若 OpenCV 带 OpenCL 支持，则去畸变在 GPU 上执行
+        num_threads：OpenCV 内部并行线程数（树莓派 4B 为 4 核）
+        undistort_mode:
+        - "remap"：预计算映射表 + cv2.remap（默认）
+        - "numba"：Numba JIT 逐像素计算畸变模型，无映射表访存
+        enable_undistort=False 时跳过去畸变，只把原图拷到输出缓冲；
+        畸变系数全部小于 IDENTITY_DIST_EPS 时也自动跳过
+        """
+        # 开启 SIMD 优化路径与多线程 parallel_for_
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(num_threads)
+        if not cv2.checkHardwareSupport(cv2.CPU_NEON):
+            logger.info("OpenCV 未启用 NEON，可用 -DCPU_BASELINE=NEON 重新编译")
+
+        try:
+            mtime_ns = Path(config_path).stat().st_mtime_ns
+        except FileNotFoundError:
+            # 交给 config_loader 报统一的"配置文件缺失"错误
+            mtime_ns = None
+        self.K, self.dist, cam_cfg = _load_intrinsics(config_path, mtime_ns)
+        # 缓存中的 dict 各实例共享，拷贝一份避免修改互相影响
+        self.cam_cfg = copy.deepcopy(cam_cfg)
 
         self.fx = self.cam_cfg["fx"]
         self.fy = self.cam_cfg["fy"]
         self.cx = self.cam_cfg["cx"]
         self.cy = self.cam_cfg["cy"]
-        self.dist = np.array(self.cam_cfg["dist"], dtype=np.float32)
 
-        self.K = np.array([
-            [self.fx, 0, self.cx],
-            [0, self.fy, self.cy],
-            [0,    0,     1]
-        ], dtype=np.float32)
+        self.gray = gray
+        self.alpha = 1.0
+        self.roi = None
+        # 去畸变输出图像对应的内参（主点已按 ROI 平移），open() 后可用
+        self.new_K = None
+        self.full_size = (640, 480)
+        self.width = None
+        self.height = None
 
         self.cap = None
+        self.picam = None
+        self.backend = "v4l2"
         self.target_fps = max(5, target_fps)
         self.frame_interval = 1.0 / self.target_fps
 
-    def open(self, device_id=0, width=640, height=480):
-        self.cap = cv2.VideoCapture(device_id)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
+        # 去畸变映射表（open() 时按分辨率生成一次）
+        self.map1 = None
+        self.map2 = None
+
+        # OpenCL（T-API）去畸变：映射表常驻显存
+        self.use_opencl = use_opencl and cv2.ocl.haveOpenCL()
+        if use_opencl and not self.use_opencl:
+            logger.warning("OpenCV 未启用 OpenCL，去畸变使用 CPU")
+        if self.use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+        self._umap1 = None
+        self._umap2 = None
+
+        if undistort_mode == "numba" and njit is None:
+            logger.warning("未安装 numba，去畸变退回 remap 模式")
+            undistort_mode = "remap"
+        self.undistort_mode = undistort_mode
+        self._jit_params = None
+
+        self.enable_undistort = enable_undistort
+        if enable_undistort and (
+                self.dist.size == 0 or
+                float(np.max(np.abs(self.dist))) < self.IDENTITY_DIST_EPS):
+            logger.info("畸变系数可忽略，跳过去畸变")
+            self.enable_undistort = False
+
+        # 预分配的 remap 输出缓冲（轮转复用，避免逐帧分配）
+        self._out = []
+        self._out_idx = 0
+
+        # 丢帧统计
+        self.frame_count = 0
+        self.dropped_count = 0
+
+        # 后台采集线程；与下游通过 Condition 交接最新一帧（无队列、无拷贝）
+        self._cond = threading.Condition()
+        self._latest = None
+        self._latest_idx = None
+        self._held_idx = None
+        self._seq = 0
+        self._read_seq = 0
+        self._raw = None
+        self._bgr = None
+        self._gray = None
+        self._yuyv_raw = False
+        self._stop = threading.Event()
+        # 采集线程读帧与 close() 释放设备互斥，避免 release 时 grab 仍在进行
+        self._dev_lock = threading.Lock()
+        self._thread = None
+        self._stats_thread = None
+        # 采集线程异常退出时保存的异常
+        self._error = None
+
+    def open(self, device_id=0, width=640, height=480, backend="v4l2",
+             pixel_format="YUYV", scale=1.0, alpha=1.0, buffer_size=2):
+        """
+        width / height：内参标定对应的全分辨率
+        backend:
+        - "v4l2"：OpenCV 默认 V4L2 采集
+        - "libcamera"：GStreamer libcamerasrc 管线，由 ISP 完成去马赛克/缩放，
+          appsink 只保留最新一帧，无需手动清空缓冲
+        - "v4l2_hwjpeg"：GStreamer v4l2src 采集 MJPG，由 VPU 硬件解码
+          （v4l2jpegdec，/dev/video10），JPEG 解码不占 CPU
+        - "picamera2"：经 libcamera 采集（CSI 摄像头），由 ISP 直接输出
+          所需尺寸与格式；capture_array 仍会拷贝一次缓冲
+        pixel_format:
+        - V4L2 下请求的像素格式
+        - "YUYV"（默认）：640x480 原始数据 USB2 带宽足够，省去逐帧 JPEG
+          解码；关闭 OpenCV 内部转换，由采集线程按需 cvtColor 或直接取 Y 平面
+        - "MJPG"：更高分辨率/帧率时带宽更小，但每帧需 CPU 解码
+        - None 表示沿用驱动默认格式
+        scale:
+        - 采集缩放比例，如 0.5 即 320x240，由摄像头直接输出小图（不占 CPU），
+          remap 处理的像素随之减少；下游按像素计算的量需同步乘以 scale
+        alpha:
+        - 1：保留全部原始像素（含边缘黑角），输出与采集同尺寸
+        - 0：只输出有效区域 self.roi，边缘畸变严重的像素不再参与 remap
+        buffer_size:
+        - V4L2 驱动缓冲数。只有 1 个时用户态占用期间驱动无处 DMA 下一帧，
+          会隔帧丢失；2 个可乒乓交替，配合取帧前清空积压仍保证拿到最新帧
+        """
+        self.alpha = alpha
+        self.backend = backend
+        self.full_size = (width, height)
+        width = int(width * scale)
+        height = int(height * scale)
+        self.width = width
+        self.height = height
 
-        if not self.cap.isOpened():
+        # 灰度模式：必须是 YUYV 原始数据才能直接取 Y 平面
+        if self.gray:
+            pixel_format = "YUYV"
+        self._yuyv_raw = (backend == "v4l2" and pixel_format == "YUYV")
+
+        if backend == "picamera2":
+            self._open_picamera2(width, height)
+        elif backend in ("libcamera", "v4l2_hwjpeg"):
+            self.cap = cv2.VideoCapture(
+                self._gst_pipeline(device_id, width, height), cv2.CAP_GSTREAMER
+            )
+        else:
+            self.cap = cv2.VideoCapture(device_id)
+            # 像素格式需在分辨率/帧率之前设置才能生效
+            if pixel_format:
+                self.cap.set(cv2.CAP_PROP_FOURCC,
+                             cv2.VideoWriter_fourcc(*pixel_format))
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
+            # 驱动缓冲保持很少，避免下游卡顿时延迟累积
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+            if self._yuyv_raw:
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+        if self.picam is None and not self.cap.isOpened():
             raise RuntimeError("摄像头打开失败")
 
+        if backend == "v4l2" and pixel_format:
+            actual = self._fourcc_str(self.cap.get(cv2.CAP_PROP_FOURCC))
+            if actual != pixel_format:
+                logger.warning("摄像头不支持 %s 格式，实际为 %s",
+                               pixel_format, actual)
+            # 未协商到 YUYV 时恢复 OpenCV 的颜色转换，按普通 BGR 帧处理
+            if self._yuyv_raw and actual != "YUYV":
+                self._yuyv_raw = False
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            # MJPG 逐帧软解码，非 libjpeg-turbo（无 NEON）时耗时约翻倍
+            if actual == "MJPG" and "turbo" not in _jpeg_codec_info():
+                logger.warning("OpenCV 的 JPEG 解码库不是 libjpeg-turbo（%s），"
+                               "MJPG 解码较慢，建议改用 YUYV 或 v4l2_hwjpeg",
+                               _jpeg_codec_info() or "未知")
+
+        # 驱动会把请求的分辨率调整到最接近的支持模式，以实际协商结果为准
+        # （映射表、输出缓冲、YUYV 取亮度都依赖真实尺寸）
+        if backend == "v4l2":
+            actual_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            actual_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if actual_w > 0 and actual_h > 0 and (
+                    (actual_w, actual_h) != (width, height)):
+                logger.warning("请求分辨率 %dx%d，实际为 %dx%d",
+                               width, height, actual_w, actual_h)
+                width, height = actual_w, actual_h
+                self.width, self.height = width, height
+
+        self._build_undistort_maps(width, height)
+        self._warm_up_pools(width, height)
+
+        self._stop.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        if logger.isEnabledFor(logging.DEBUG):
+            self._stats_thread = threading.Thread(target=self._stats_loop,
+                                                  daemon=True)
+            self._stats_thread.start()
+
+    def _open_picamera2(self, width, height):
+        if Picamera2 is None:
+            raise RuntimeError("未安装 picamera2，无法使用该采集后端")
+
+        # picamera2 的 "RGB888" 在内存中即为 B,G,R 顺序，可直接交给 OpenCV；
+        # 灰度模式取 YUV420 的前 height 行（Y 平面），行宽含 stride 对齐填充
+        fmt = "YUV420" if self.gray else "RGB888"
+        self.picam = Picamera2()
+        self.picam.configure(self.picam.create_video_configuration(
+            main={"size": (width, height), "format": fmt},
+            controls={"FrameRate": float(self.target_fps)},
+            buffer_count=2
+        ))
+        self.picam.start()
+
+    @staticmethod
+    def _fourcc_str(code):
+        code = int(code)
+        return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+    def _gst_pipeline(self, device_id, width, height):
+        fmt = "GRAY8" if self.gray else "BGR"
+        fps = int(self.target_fps)
+        sink = "appsink drop=1 max-buffers=1 sync=false"
+
+        if self.backend == "v4l2_hwjpeg":
+            # io-mode=dmabuf：采集缓冲以 dmabuf 直接交给硬件解码器，
+            # 中间不经用户态拷贝
+            return (
+                f"v4l2src device=/dev/video{device_id} io-mode=dmabuf ! "
+                f"image/jpeg,width={width},height={height},"
+                f"framerate={fps}/1 ! "
+                "v4l2jpegdec ! videoconvert ! "
+                f"video/x-raw,format={fmt} ! {sink}"
+            )
+
+        return (
+            "libcamerasrc ! "
+            f"video/x-raw,format={fmt},"
+            f"width={width},height={height},"
+            f"framerate={fps}/1 ! {sink}"
+        )
+
+    def _build_undistort_maps(self, w, h):
+        """
+        预先计算去畸变映射表，逐帧只做 remap 查表
+        采集分辨率与标定分辨率不同时按比例缩放内参
+        """
+        full_w, full_h = self.full_size
+        K = self.K.copy()
+        K[0] *= w / full_w
+        K[1] *= h / full_h
+
+        new_K, roi = cv2.getOptimalNewCameraMatrix(
+            K, self.dist, (w, h), self.alpha
+        )
+        x, y, roi_w, roi_h = roi
+        if roi_w <= 0 or roi_h <= 0:
+            x, y, roi_w, roi_h = 0, 0, w, h
+        self.roi = (x, y, roi_w, roi_h)
+        new_K = new_K.copy()
+        out_w, out_h = w, h
+        # 仅 alpha=0 时裁剪：输出只覆盖有效 ROI，主点平移到 ROI 左上角为原点；
+        # 其余情况输出与采集同尺寸，self.roi 标出其中的有效区域
+        if self.alpha == 0:
+            out_w, out_h = roi_w, roi_h
+            new_K[0, 2] -= x
+            new_K[1, 2] -= y
+        new_K.setflags(write=False)
+        self.new_K = new_K
+
+        if not self.enable_undistort:
+            self.roi = (0, 0, w, h)
+            self.new_K = K
+            out_w, out_h = w, h
+        elif self.undistort_mode == "numba":
+            k = [float(v) for v in self.dist] + [0.0] * 5
+            self._jit_params = (
+                float(K[0, 0]), float(K[1, 1]), float(K[0, 2]), float(K[1, 2]),
+                float(new_K[0, 0]), float(new_K[1, 1]),
+                float(new_K[0, 2]), float(new_K[1, 2]),
+                k[0], k[1], k[2], k[3], k[4]
+            )
+        else:
+            map1, map2 = cv2.initUndistortRectifyMap(
+                K, self.dist, None, new_K, (out_w, out_h), self.MAP_TYPE
+            )
+            # 映射表每帧整表读取，放到 64 字节对齐的内存中（只在 open 时拷贝一次）
+            self.map1 = _aligned_copy(map1)
+            self.map2 = _aligned_copy(map2)
+            if self.use_opencl:
+                self._umap1 = cv2.UMat(self.map1)
+                self._umap2 = cv2.UMat(self.map2)
+
+        shape = (out_h, out_w) if self.gray else (out_h, out_w, 3)
+        self._out = [_aligned_empty(shape, np.uint8)
+                     for _ in range(self.OUT_BUFFERS)]
+        self._out_idx = 0
+
+    def _acquire_out(self):
+        """
+        挑一个既不是最新待取、也不在下游手里的输出缓冲
+        """
+        with self._cond:
+            busy = (self._latest_idx, self._held_idx)
+        for i in range(len(self._out)):
+            if i not in busy:
+                self._out_idx = i
+                return self._out[i]
+        return None
+
     def undistort(self, frame):
+        if isinstance(frame, cv2.UMat):
+            # 采集线程已在 GPU 上完成颜色转换，映射表在 open() 时已建好
+            self._out_idx = None
+            return cv2.remap(frame, self._umap1, self._umap2,
+                             cv2.INTER_LINEAR).get()
+
         h, w = frame.shape[:2]
-        new_K, _ = cv2.getOptimalNewCameraMatrix(self.K, self.dist, (w, h), 1)
-        return cv2.undistort(frame, self.K, self.dist, None, new_K)
+        if (w, h) != (self.width, self.height) or not self._out:
+            self.width, self.height = w, h
+            self._build_undistort_maps(w, h)
 
-    def frames(self):
+        if not self.enable_undistort:
+            # 原始缓冲下一帧会被 retrieve 覆盖，拷到输出缓冲再交给下游
+            out = self._acquire_out()
+            if out is None or out.shape != frame.shape:
+                self._out_idx = None
+                return frame.copy()
+            np.copyto(out, frame)
+            return out
+
+        if self.undistort_mode == "numba":
+            out = self._acquire_out()
+            c = frame.shape[2] if frame.ndim == 3 else 1
+            _undistort_kernel(frame.reshape(h, w, c),
+                              out.reshape(out.shape[0], out.shape[1], c),
+                              *self._jit_params)
+            return out
+
+        if self.use_opencl:
+            self._out_idx = None
+            out = cv2.remap(cv2.UMat(frame), self._umap1, self._umap2,
+                            cv2.INTER_LINEAR)
+            return out.get()
+
+        dst = self._acquire_out()
+        if dst.ndim != frame.ndim:
+            self._out_idx = None
+            dst = None
+        return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR,
+                         dst=dst)
+
+    def __iter__(self):
         """
-        生成器：持续输出去畸变帧
+        迭代器：持续输出去畸变帧（由后台采集线程提供）
+        输出帧位于复用的缓冲中，只保证在下一次取帧前有效，
+        下游若需跨帧保留请自行 copy()
         """
-        if self.cap is None:
+        if self._thread is None:
             self.open()
+        return self
 
-        last_time = 0
+    def __next__(self):
+        with self._cond:
+            while self._seq == self._read_seq:
+                if self._stop.is_set():
+                    if self._error is not None:
+                        raise RuntimeError("采集线程异常退出") from self._error
+                    raise StopIteration
+                self._cond.wait(timeout=1.0)
 
-        while True:
-            ok, frame = self.cap.read()
-            if not ok:
+            self._read_seq = self._seq
+            self._held_idx = self._latest_idx
+            return self._latest
+
+    def frames(self):
+        """
+        兼容旧接口，等价于 iter(camera)
+        """
+        return iter(self)
+
+    def _capture_loop(self):
+        """
+        后台线程：采集 + 去畸变，与下游处理流水并行
+        异常退出时记录异常并唤醒下游，由 __next__ 抛出，避免下游永远等待
+        """
+        try:
+            self._run_capture()
+        except Exception as e:
+            logger.exception("采集线程异常退出")
+            self._error = e
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    def _run_capture(self):
+        self._setup_capture_thread()
+        next_deadline = _coarse_now()
+        read_failed = False
+
+        while not self._stop.is_set():
+            # 未到截止时间则休眠等待，不再空转读帧丢弃
+            now = _coarse_now()
+            wait = next_deadline - now
+            if wait > 0:
+                self._stop.wait(wait)
                 continue
 
-            now = time.time()
-            if now - last_time < self.frame_interval:
+            with self._dev_lock:
+                if self._stop.is_set():
+                    break
+                frame = self._read_frame()
+            if frame is None:
+                # 读帧失败（摄像头断开、GStreamer EOS 等）往往立即返回，
+                # 实时优先级线程不等待就会占满所在核
+                if not read_failed:
+                    logger.warning("摄像头读帧失败，%.0f ms 后重试",
+                                   self.frame_interval * 1000)
+                    read_failed = True
+                self._stop.wait(self.frame_interval)
                 continue
-            last_time = now
+            if read_failed:
+                logger.info("摄像头读帧恢复")
+                read_failed = False
+
+            # 绝对截止时间：读帧 / 去畸变耗时不累加到帧间隔上；
+            # 落后超过一帧时从当前时刻重新对齐，不连续追赶
+            next_deadline += self.frame_interval
+            if next_deadline < now:
+                next_deadline = now + self.frame_interval
 
-            frame = self.undistort(frame)
-            yield frame
+            self.frame_count += 1
+
+            out = self.undistort(frame)
+            self._publish(out, self._out_idx)
+
+    def _stats_loop(self):
+        """
+        独立线程定期输出统计，采集热路径不做任何日志调用
+        """
+        last_count = self.frame_count
+        while not self._stop.wait(self.STATS_INTERVAL_S):
+            count = self.frame_count
+            logger.debug("输出 %.1f fps，累计 %d 帧，丢弃积压帧 %d",
+                         (count - last_count) / self.STATS_INTERVAL_S,
+                         count, self.dropped_count)
+            last_count = count
+
+    def _warm_up_pools(self, width, height):
+        """
+        在当前（未绑核、普通调度）线程里先跑一次去畸变：
+        OpenCV parallel_for_ 与 numba parallel 的工作线程都在首次调用时创建，
+        并继承创建者的 CPU 亲和性与调度策略；若首次调用发生在已绑到
+        CAPTURE_CPU、SCHED_FIFO 的采集线程里，多线程去畸变会全部挤在一个核上
+        """
+        shape = (height, width) if self.gray else (height, width, 3)
+        self.undistort(np.zeros(shape, dtype=np.uint8))
+
+    def _setup_capture_thread(self):
+        """
+        采集线程独占一个核并使用 SCHED_FIFO，减小帧间隔抖动；
+        其余核留给检测与控制。无权限（需 CAP_SYS_NICE）或非 Linux 时忽略
+        """
+        # Linux 下 pid=0 作用于当前线程
+        try:
+            if self.CAPTURE_CPU is not None:
+                os.sched_setaffinity(0, {self.CAPTURE_CPU})
+        except (AttributeError, OSError) as e:
+            logger.debug("采集线程绑核失败：%s", e)
+
+        try:
+            if self.CAPTURE_RT_PRIORITY is not None:
+                os.sched_setscheduler(
+                    0, os.SCHED_FIFO,
+                    os.sched_param(self.CAPTURE_RT_PRIORITY)
+                )
+        except (AttributeError, OSError) as e:
+            logger.debug("采集线程设置实时调度失败：%s", e)
+
+    def _read_frame(self):
+        """
+        从当前后端读取最新一帧，失败返回 None
+        """
+        if self.picam is not None:
+            frame = self.picam.capture_array("main")
+            # 去掉 stride 对齐多出的列，否则 undistort 会按填充后的宽度重建映射表
+            return frame[:self.height, :self.width]
+
+        # grab 只取出缓冲，retrieve 才解码
+        if not self.cap.grab():
+            return None
+        if self.backend == "v4l2":
+            self._drain_to_latest()
+        # 解码到上一帧的原始缓冲中（尺寸一致时 OpenCV 直接复用）
+        ok, frame = self.cap.retrieve(self._raw)
+        if not ok:
+            return None
+        self._raw = frame
+
+        if self._yuyv_raw:
+            if self.gray:
+                return self._yuyv_luma(frame)
+            yuyv = frame.reshape(self.height, -1, 2)
+            if self._umap1 is not None and self.enable_undistort:
+                # OpenCL：颜色转换与 remap 连续在 GPU 上做，只在输出时取回一次
+                return cv2.cvtColor(cv2.UMat(yuyv), cv2.COLOR_YUV2BGR_YUYV)
+            # YUYV -> BGR 走 OpenCV 的 NEON 实现
+            self._bgr = cv2.cvtColor(yuyv, cv2.COLOR_YUV2BGR_YUYV,
+                                     dst=self._bgr)
+            return self._bgr
+        if self.gray and frame.ndim == 3:
+            # 灰度模式但驱动未给出 YUYV，只能从 BGR 转换
+            self._gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            return self._gray
+        return frame
+
+    def _yuyv_luma(self, frame):
+        """
+        YUYV 排列为 Y0 U Y1 V，偶数字节即亮度
+        """
+        yuyv = frame.reshape(self.height, -1, 2)
+        # 提取到复用的灰度缓冲，不再逐帧分配
+        self._gray = cv2.extractChannel(yuyv, 0, dst=self._gray)
+        return self._gray
+
+    def _publish(self, frame, idx):
+        """
+        发布最新一帧并唤醒下游；下游来不及取时旧帧直接被覆盖
+        """
+        with self._cond:
+            self._latest = frame
+            self._latest_idx = idx
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _drain_to_latest(self):
+        """
+        连续 grab 丢弃驱动缓冲中的旧帧，保证 retrieve 拿到最新一帧
+        grab 阻塞（缓冲已空、等到新帧）或达到上限即停止
+        """
+        for _ in range(self.MAX_DRAIN_FRAMES):
+            t0 = time.monotonic()
+            if not self.cap.grab():
+                break
+            self.dropped_count += 1
+            if time.monotonic() - t0 > self.DRAIN_BLOCK_S:
+                break
 
     def close(self):
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._stats_thread is not None:
+            self._stats_thread.join(timeout=1.0)
+            self._stats_thread = None
+
+        # 采集线程若还卡在 grab 中，等它返回后再释放
+        with self._dev_lock:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+
+            if self.picam is not None:
+                self.picam.stop()
+                self.picam.close()
+                self.picam = None
 
 
 if __name__ == "__main__":
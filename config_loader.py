@@ -10,11 +10,32 @@ config_loader.py
 3）速度 / 向量 / PID 参数文件
 
 所有 json 在运行时重新读取，便于在线调参
+（按文件修改时间缓存解析结果，文件未改动时不重复读盘）
 """
 
+import copy
 import json
+import functools
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    # 未安装 orjson 时退回标准库
+    orjson = None
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_load(path_str, mtime_ns):
+    """
+    mtime_ns 仅作为缓存键：文件被修改后自动失效重新解析
+    """
+    if orjson is not None:
+        with open(path_str, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path_str, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 
 class ConfigLoader:
     def __init__(self,
@@ -27,10 +48,12 @@ class ConfigLoader:
         self.speed_json = Path(speed_json)
 
     def _load_json(self, path: Path):
-        if not path.exists():
-            raise FileNotFoundError(f"配置文件缺失: {path}")
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"配置文件缺失: {path}") from None
+        # 返回副本，避免调用方修改污染缓存
+        return copy.deepcopy(_cached_load(str(path), mtime_ns))
 
     def load_camera_params(self):
         """
@@ -79,9 +102,26 @@ class ConfigLoader:
         }
 
 
+_loaders = {}
+
+
+def get_loader(camera_json="config/camera_intrinsics.json",
+               qr_json="config/qr_params.json",
+               speed_json="config/speed_params.json"):
+    """
+    进程内共享的 ConfigLoader：相同路径组合只创建一次
+    """
+    key = (str(camera_json), str(qr_json), str(speed_json))
+    loader = _loaders.get(key)
+    if loader is None:
+        loader = ConfigLoader(*key)
+        _loaders[key] = loader
+    return loader
+
+
 if __name__ == "__main__":
     # 简单测试
-    loader = ConfigLoader()
+    loader = get_loader()
     all_cfg = loader.load_all()
     print("配置读取成功：")
     print(all_cfg.keys())
\ No newline at end of file
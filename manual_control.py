@@ -14,8 +14,9 @@ manual_control.py
 若要接入真实电机，请替换 drive_motor_* 函数
 """
 
-import time
-from config_loader import ConfigLoader
+import os
+
+from config_loader import get_loader
 
 
 # =========================
@@ -32,7 +33,7 @@ def drive_motor_right(speed):
 
 class ManualController:
     def __init__(self, speed_config="config/speed_params.json"):
-        loader = ConfigLoader(speed_json=speed_config)
+        loader = get_loader(speed_json=speed_config)
         cfg = loader.load_speed_params()
 
         self.max_speed = float(cfg.get("max_speed", 1.0))
@@ -58,7 +59,7 @@ class ManualController:
         return self.set_speed(0.0, 0.0)
 
     # ========= 键盘控制（可选） =========
-    def interactive(self):
+    def interactive(self, on_tick=None):
         """
         简单键盘控制：
             w: 前进
@@ -67,25 +68,61 @@ class ManualController:
             d: 右转
             space: 停止
             q: 退出
+        on_tick：可选回调，无按键时也约每 0.05 s 调用一次（周期性任务）
         """
         print("手动控制模式：w/s/a/d, 空格停止, q退出")
 
         import sys
+        import select
         import termios
         import tty
-
-        def getch():
+        from contextlib import contextmanager
+
+        @contextmanager
+        def cbreak_terminal():
+            """
+            整个会话只切换一次终端模式，而不是每个按键都 tcsetattr 两次；
+            cbreak 保留输出换行处理与 Ctrl+C
+            """
             fd = sys.stdin.fileno()
             old = termios.tcgetattr(fd)
             try:
-                tty.setraw(fd)
-                ch = sys.stdin.read(1)
+                tty.setcbreak(fd)
+                yield
             finally:
                 termios.tcsetattr(fd, termios.TCSADRAIN, old)
-            return ch
 
+        fd = sys.stdin.fileno()
+
+        def getch(timeout):
+            # 直接读文件描述符：sys.stdin 自带缓冲，连按时多余字符留在
+            # Python 缓冲里，select 看不到，会被延迟到下一次按键才处理
+            # 返回 None 表示超时；"" 表示 EOF / 终端挂断
+            r, _, _ = select.select([fd], [], [], timeout)
+            if not r:
+                return None
+            return os.read(fd, 1).decode("latin-1")
+
+        with cbreak_terminal():
+            # cbreak 下 Ctrl+C 会抛 KeyboardInterrupt，任何方式退出都先停车
+            try:
+                self._key_loop(getch, on_tick)
+            finally:
+                self.stop()
+
+    def _key_loop(self, getch, on_tick=None):
         while True:
-            key = getch()
+            key = getch(0.05)
+            if on_tick is not None:
+                on_tick()
+            if key is None:
+                continue
+
+            # stdin 已关闭（管道结束、SSH 断开）：select 会一直报可读，
+            # 不退出就会空转且电机保持当前速度；停车由调用方 finally 负责
+            if key == "":
+                print("输入已关闭，退出手动控制")
+                return
 
             if key == "w":
                 self.set_speed(self.l + self.step, self.r + self.step)
@@ -103,11 +140,8 @@ class ManualController:
                 self.stop()
 
             elif key == "q":
-                self.stop()
                 print("退出手动控制")
-                break
-
-            time.sleep(0.05)
+                return
 
 
 if __name__ == "__main__":
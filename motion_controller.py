@@ -33,7 +33,7 @@ motion_controller.py
 }
 """
 
-from config_loader import ConfigLoader
+from config_loader import get_loader
 import math
 import time
 
@@ -42,7 +42,7 @@ class MotionController:
     def __init__(self,
                  speed_config="config/speed_params.json"):
 
-        loader = ConfigLoader(speed_json=speed_config)
+        loader = get_loader(speed_json=speed_config)
         self.cfg = loader.load_speed_params()
 
         sp = self.cfg
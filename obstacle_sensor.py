@@ -18,8 +18,29 @@ obstacle_sensor.py
 
 import time
 import json
+import logging
+import threading
 from pathlib import Path
-from config_loader import ConfigLoader
+from config_loader import get_loader
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    # 非树莓派环境下只能使用占位读数
+    GPIO = None
+
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# 默认引脚配置（BCM编号）
+TRIGGER_PIN = 23  # GPIO23
+ECHO_PIN = 24     # GPIO24
 
 
 # =========================
@@ -29,22 +50,174 @@ def mock_ultrasonic_read():
     """
     默认提供一个占位读数函数
     实际部署时改成：
-    - RPi.GPIO
+    - RPi.GPIO（见 UltrasonicSensor）
     - pigpio
     - 或 I2C / UART 距离模块
     """
     return 9999.0  # 默认无障碍
 
 
+class UltrasonicSensor:
+    """
+    HC-SR04 超声波测距（RPi.GPIO 边沿中断计时）
+
+    回波高电平的上升/下降沿由 GPIO 中断回调记录时间戳，
+    测距线程阻塞在 Event 上等待，不再 while 轮询引脚空转占用 CPU
+
+    RPi.GPIO 的回调在线程中延后执行，近距离回波（12 cm 约 0.7 ms）
+    回调时引脚可能已回落，不能再读电平判断沿的方向：
+    触发后收到的第 1 个沿记为上升、第 2 个记为下降。
+    时间戳是回调执行时刻，需要精确测距时用 PigpioUltrasonicSensor
+
+    实例可直接作为 ObstacleSensor 的 distance_reader 传入
+    """
+
+    # 声速 343 m/s，往返取一半：17150 cm/s
+    HALF_SOUND_CM_PER_NS = 17150.0 / 1e9
+
+    def __init__(self, trigger_pin=TRIGGER_PIN, echo_pin=ECHO_PIN,
+                 timeout_s=0.04):
+        if GPIO is None:
+            raise RuntimeError("未安装 RPi.GPIO，无法读取超声波传感器")
+
+        self.trigger_pin = trigger_pin
+        self.echo_pin = echo_pin
+        self.timeout_s = timeout_s
+
+        self._rise_ns = None
+        self._fall_ns = None
+        self._armed = False
+        self._echo_done = threading.Event()
+
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(trigger_pin, GPIO.OUT, initial=GPIO.LOW)
+        GPIO.setup(echo_pin, GPIO.IN)
+        GPIO.add_event_detect(echo_pin, GPIO.BOTH, callback=self._echo_cb)
+
+    def _echo_cb(self, channel):
+        now = time.perf_counter_ns()
+        if not self._armed:
+            return
+        if self._rise_ns is None:
+            self._rise_ns = now
+        else:
+            self._fall_ns = now
+            self._armed = False
+            self._echo_done.set()
+
+    def distance(self):
+        """
+        返回距离（cm）；超时未收到完整回波返回 None（由调用方决定如何处理）
+        """
+        self._rise_ns = None
+        self._fall_ns = None
+        self._echo_done.clear()
+        self._armed = True
+
+        # 10us 触发脉冲
+        GPIO.output(self.trigger_pin, GPIO.HIGH)
+        time.sleep(0.00001)
+        GPIO.output(self.trigger_pin, GPIO.LOW)
+
+        if not self._echo_done.wait(self.timeout_s):
+            self._armed = False
+            return None
+
+        return (self._fall_ns - self._rise_ns) * self.HALF_SOUND_CM_PER_NS
+
+    __call__ = distance
+
+    def close(self):
+        GPIO.remove_event_detect(self.echo_pin)
+        GPIO.cleanup((self.trigger_pin, self.echo_pin))
+
+
+class PigpioUltrasonicSensor:
+    """
+    HC-SR04 超声波测距（pigpio 硬件时间戳）
+
+    回波边沿时刻由 pigpiod 按 DMA 采样记录（微秒 tick），
+    不受 Python 回调调度延迟影响，测距噪声更小
+    需先启动守护进程：sudo pigpiod
+    """
+
+    # 声速往返取一半：0.01715 cm/us
+    HALF_SOUND_CM_PER_US = 0.01715
+
+    def __init__(self, trigger_pin=TRIGGER_PIN, echo_pin=ECHO_PIN,
+                 timeout_s=0.04):
+        if pigpio is None:
+            raise RuntimeError("未安装 pigpio，无法读取超声波传感器")
+
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpiod 未运行")
+
+        self.trigger_pin = trigger_pin
+        self.echo_pin = echo_pin
+        self.timeout_s = timeout_s
+
+        self._rise_tick = None
+        self._fall_tick = None
+        self._echo_done = threading.Event()
+
+        self.pi.set_mode(trigger_pin, pigpio.OUTPUT)
+        self.pi.write(trigger_pin, 0)
+        self.pi.set_mode(echo_pin, pigpio.INPUT)
+
+        self._cb_rise = self.pi.callback(echo_pin, pigpio.RISING_EDGE,
+                                         self._on_rise)
+        self._cb_fall = self.pi.callback(echo_pin, pigpio.FALLING_EDGE,
+                                         self._on_fall)
+
+    def _on_rise(self, gpio, level, tick):
+        self._rise_tick = tick
+
+    def _on_fall(self, gpio, level, tick):
+        if self._rise_tick is not None:
+            self._fall_tick = tick
+            self._echo_done.set()
+
+    def distance(self):
+        """
+        返回距离（cm）；超时未收到完整回波返回 None（由调用方决定如何处理）
+        """
+        self._rise_tick = None
+        self._fall_tick = None
+        self._echo_done.clear()
+
+        # 10us 触发脉冲由 pigpiod 硬件定时发出
+        # （time.sleep 在 Linux 上最短约 60us，会拉长脉冲）
+        self.pi.gpio_trigger(self.trigger_pin, 10, 1)
+
+        if not self._echo_done.wait(self.timeout_s):
+            return None
+
+        dt_us = pigpio.tickDiff(self._rise_tick, self._fall_tick)
+        return dt_us * self.HALF_SOUND_CM_PER_US
+
+    __call__ = distance
+
+    def close(self):
+        self._cb_rise.cancel()
+        self._cb_fall.cancel()
+        self.pi.stop()
+
+
 class ObstacleSensor:
+    # 连续读不到回波时先沿用上次读数，超过该次数视为无读数（停车等待）
+    MAX_MISSED_READS = 3
+
     def __init__(self,
                  speed_config="config/speed_params.json",
                  distance_reader=mock_ultrasonic_read):
 
-        loader = ConfigLoader(speed_json=speed_config)
+        loader = get_loader(speed_json=speed_config)
         self.speed_cfg = loader.load_speed_params()
 
         self.reader = distance_reader
+        self._last_distance = None
+        self._missed = 0
 
         obst = self.speed_cfg.get("obstacle", {})
 
@@ -70,10 +243,28 @@ class ObstacleSensor:
         return time.time() - self.phase_start
 
     def read_distance(self):
+        """
+        丢失回波不能当作前方无障碍：短暂丢失沿用上次读数，
+        持续丢失返回 None，由 update() 停车等待
+        """
         try:
-            return float(self.reader())
+            d = self.reader()
         except Exception:
-            return 9999.0
+            logger.exception("超声波读数异常")
+            d = None
+
+        if d is not None:
+            self._missed = 0
+            self._last_distance = float(d)
+            return self._last_distance
+
+        self._missed += 1
+        if self._last_distance is not None and self._missed <= self.MAX_MISSED_READS:
+            return self._last_distance
+
+        if self._missed == self.MAX_MISSED_READS + 1:
+            logger.warning("超声波连续 %d 次无回波，停车等待恢复", self._missed)
+        return None
 
     def update(self):
         """
@@ -84,12 +275,28 @@ class ObstacleSensor:
             "avoid_mode": bool,
             "phase": str|None,
             "action": "right"|"left"|"forward"|"stop"|None,
-            "distance_cm": float
+            "distance_cm": float|None
         }
         """
 
         d = self.read_distance()
 
+        # ---- 无读数：仅在读数缺失期间停车，不改动避障状态机 ----
+        if d is None:
+            return dict(
+                obstacle_near=False,
+                need_stop=True,
+                avoid_mode=True,
+                phase="NO_READING",
+                action="stop",
+                distance_cm=None
+            )
+
+        # ---- 已离开停车距离：解除 STOP_CLOSE，交回正常逻辑 ----
+        if self.phase == "STOP_CLOSE" and d > self.stop_distance_cm:
+            self.avoid_mode = False
+            self.phase = None
+
         # ---- 靠得太近：强制停止 ----
         if d <= self.stop_distance_cm:
             self.avoid_mode = True
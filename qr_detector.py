@@ -16,6 +16,7 @@ qr_detector.py
     - 上下朝向趋势
 5）只选最近二维码作为目标
 6）丢失二维码时输出 lost=True
+7）锁定目标后只在其附近区域搜索，丢失时回退全图
 
 依赖：
 - OpenCV
@@ -23,16 +24,38 @@ qr_detector.py
 """
 
 import cv2
+import logging
 import numpy as np
-from config_loader import ConfigLoader
+from config_loader import get_loader
+
+
+logger = logging.getLogger(__name__)
 
 
 class QRDetector:
+    # 上一帧目标边长超过该像素数时，局部搜索改用 NEAR_SCALE 缩小检测
+    NEAR_QR_PX = 80
+    NEAR_SCALE = 0.5
+    # 静止画面判定：锁定目标时，目标 ROI 的 16x16 缩略图平均绝对差
+    # 低于阈值则复用上一帧结果，最多连续复用 STATIC_MAX_REUSE 次
+    STATIC_THUMB = 16
+    STATIC_DIFF = 2.0
+    STATIC_MAX_REUSE = 3
+
     def __init__(self,
                  camera_config="config/camera_intrinsics.json",
-                 qr_config="config/qr_params.json"):
+                 qr_config="config/qr_params.json",
+                 detect_scale=1.0, backend="opencv"):
+        """
+        detect_scale < 1 时先在缩小图像上定位（如 0.5 像素数降为 1/4），
+        再按角点在原图上解码；远距离小码可能因此漏检，默认不缩放
+        backend:
+        - "opencv"：cv2.QRCodeDetector（默认）
+        - "wechat"：opencv-contrib 的 WeChatQRCode，对模糊、倾斜、
+          小尺寸码更稳；未安装 contrib 时退回 "opencv"
+        """
 
-        loader = ConfigLoader(
+        loader = get_loader(
             camera_json=camera_config,
             qr_json=qr_config
         )
@@ -48,9 +71,28 @@ class QRDetector:
         # 二维码真实尺寸（cm）
         self.qr_size_cm = float(self.qr_cfg["qr_size_cm"])
         self.valid_digits = int(self.qr_cfg["valid_id_digits"])
-        self.valid_dict = self.qr_cfg.get("qr_dict", {})
+        # 识别结果是 str，配置里写成整数（列表或字典键）时统一转成 str，
+        # 否则永远匹配不上
+        self.valid_ids = {str(k) for k in self.qr_cfg.get("qr_dict", {})}
 
         self.detector = cv2.QRCodeDetector()
+        self._wechat = None
+        if backend == "wechat":
+            if hasattr(cv2, "wechat_qrcode_WeChatQRCode"):
+                self._wechat = cv2.wechat_qrcode_WeChatQRCode()
+            else:
+                logger.warning("OpenCV 未包含 wechat_qrcode 模块，使用 QRCodeDetector")
+        self.detect_scale = float(detect_scale)
+
+        # 上一次命中的搜索区域 (x0, y0, x1, y1)，None 表示全图搜索
+        self._roi = None
+        # 上一次命中的目标边长（像素）
+        self._last_side = 0.0
+
+        # 静止画面跳过检测
+        self._thumb = None
+        self._last_result = None
+        self._reuse = 0
 
     def _estimate_distance(self, pts):
         """
@@ -118,11 +160,92 @@ class QRDetector:
         }
         """
 
-        data_list, pts_list, _ = self.detector.detectAndDecodeMulti(frame)
+        # 只在已锁定目标时复用，且只比较目标附近区域：
+        # 整帧缩略图对远处小码的移动 / 出现几乎没有反应
+        if (self._thumb is not None
+                and self._reuse < self.STATIC_MAX_REUSE):
+            thumb = self._roi_thumb(frame)
+            if (thumb.shape == self._thumb.shape
+                    and cv2.norm(thumb, self._thumb, cv2.NORM_L1) / thumb.size
+                    < self.STATIC_DIFF):
+                self._reuse += 1
+                return dict(self._last_result)
+
+        result = self._detect(frame)
+        self._reuse = 0
+        if result["lost"]:
+            self._thumb = None
+            self._last_result = None
+        else:
+            self._thumb = self._roi_thumb(frame)
+            self._last_result = result
+        return dict(result)
+
+    def _roi_thumb(self, frame):
+        x0, y0, x1, y1 = self._roi
+        return cv2.resize(frame[y0:y1, x0:x1],
+                          (self.STATIC_THUMB, self.STATIC_THUMB),
+                          interpolation=cv2.INTER_AREA)
+
+    def _detect(self, frame):
+        best_target = None
 
-        if pts_list is None or len(data_list) == 0:
+        # 先在上次目标附近的小区域搜索，未命中再扫全图
+        # 近处大码缩小后仍能识别，像素数降为 1/4
+        if self._roi is not None:
+            x0, y0, x1, y1 = self._roi
+            scale = self.detect_scale
+            if self._last_side > self.NEAR_QR_PX:
+                scale = min(scale, self.NEAR_SCALE)
+            best_target = self._scan(frame[y0:y1, x0:x1], x0, y0, scale)
+
+        if best_target is None:
+            best_target = self._scan(frame, 0, 0, self.detect_scale)
+
+        if best_target is None:
+            self._roi = None
+            self._last_side = 0.0
             return {"lost": True}
 
+        data, pts, dist = best_target
+        self._roi = self._roi_around(pts, frame.shape)
+        self._last_side = float(np.ptp(pts[:, 0]))
+        offsets = self._compute_offsets(pts)
+
+        return dict(
+            lost=False,
+            data=data,
+            distance_cm=dist,
+            offsets=offsets,
+            points=pts.tolist()
+        )
+
+    def _roi_around(self, pts, shape):
+        """
+        目标外接框四周各扩一个边长，作为下一帧的搜索区域
+        """
+        h, w = shape[:2]
+        x, y = pts.min(axis=0)
+        x_max, y_max = pts.max(axis=0)
+        pad = max(x_max - x, y_max - y)
+
+        return (
+            max(0, int(x - pad)), max(0, int(y - pad)),
+            min(w, int(x_max + pad) + 1), min(h, int(y_max + pad) + 1)
+        )
+
+    def _scan(self, img, ox, oy, scale):
+        """
+        在 img 中检测并挑选最近的合法二维码
+        (ox, oy) 为 img 在整帧中的偏移，scale 为检测前的缩放比例，
+        返回的角点换算回整帧坐标
+        返回 (data, pts, dist) 或 None
+        """
+        found = self._detect_decode(img, scale)
+        if found is None:
+            return None
+        data_list, pts_list = found
+
         best_target = None
         best_dist = 1e9
 
@@ -134,10 +257,11 @@ class QRDetector:
             if not data.isdigit() or len(data) != self.valid_digits:
                 continue
 
-            if self.valid_dict and data not in self.valid_dict:
+            if self.valid_ids and data not in self.valid_ids:
                 continue
 
             pts = np.array(pts, dtype=np.float32)
+            pts += (ox, oy)
 
             dist = self._estimate_distance(pts)
             if dist is None:
@@ -147,19 +271,36 @@ class QRDetector:
                 best_dist = dist
                 best_target = (data, pts, dist)
 
-        if best_target is None:
-            return {"lost": True}
-
-        data, pts, dist = best_target
-        offsets = self._compute_offsets(pts)
+        return best_target
 
-        return dict(
-            lost=False,
-            data=data,
-            distance_cm=dist,
-            offsets=offsets,
-            points=pts.tolist()
-        )
+    def _detect_decode(self, img, scale):
+        """
+        scale < 1 时在小图上定位、按换算后的角点在原图上解码：
+        定位耗时随像素数下降，解码仍用原图清晰的码元
+        WeChatQRCode 定位与解码不可拆分，忽略 scale，始终在原图上处理
+        返回 (data_list, pts_list)，角点为 img 坐标；未检测到返回 None
+        """
+        if self._wechat is not None:
+            data_list, pts_list = self._wechat.detectAndDecode(img)
+            if pts_list is None or len(data_list) == 0:
+                return None
+            return data_list, [np.asarray(p, dtype=np.float32)
+                               for p in pts_list]
+
+        if scale < 1.0:
+            small = cv2.resize(img, None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_AREA)
+            located, pts_list = self.detector.detectMulti(small)
+            if not located:
+                return None
+            pts_list = pts_list / scale
+            ok, data_list, _ = self.detector.decodeMulti(img, pts_list)
+        else:
+            ok, data_list, pts_list, _ = self.detector.detectAndDecodeMulti(img)
+
+        if not ok or pts_list is None or len(data_list) == 0:
+            return None
+        return data_list, pts_list
 
 
 if __name__ == "__main__":
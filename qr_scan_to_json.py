@@ -27,10 +27,12 @@ from camera_module import CameraModule
 
 OUTPUT_FILE = "qr_scan_result.json"
 
+# 检测器只创建一次，逐帧复用
+_qr_detector = cv2.QRCodeDetector()
+
 
 def detect_qr(frame):
-    detector = cv2.QRCodeDetector()
-    data, points, _ = detector.detectAndDecode(frame)
+    data, points, _ = _qr_detector.detectAndDecode(frame)
 
     if not data or points is None:
         return None
@@ -57,7 +59,7 @@ def save_json(result, path):
 
 
 def main():
-    cam = CameraModule()
+    cam = CameraModule(gray=True)
     cam.open()
 
     print("二维码扫描工具启动，正在等待识别...（按 Ctrl+C 退出）")
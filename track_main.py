@@ -13,13 +13,23 @@ track_main.py
 5）输出左右轮速度
 
 设计原则：
+- 二维码识别、超声波测距各自独立线程，主控制循环只读取最新结果
 - 避障优先
 - 最近二维码为目标
 - 丢失二维码 → 保持最近参数并等待恢复
 - 不开启摄像头预览窗口
+
+日志：
+- 默认 WARNING，逐帧状态不输出；设置环境变量 CAR_LOG_LEVEL=INFO/DEBUG 开启
+- 日志经队列由后台线程写出，控制线程只做入队，不阻塞在终端 IO 上
 """
 
+import os
 import time
+import queue
+import logging
+import logging.handlers
+import threading
 
 from camera_module import CameraModule
 from qr_detector import QRDetector
@@ -27,37 +37,153 @@ from obstacle_sensor import ObstacleSensor
 from motion_controller import MotionController
 
 
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """
+    根 logger 只挂 QueueHandler，真正的输出由 QueueListener 线程完成
+    返回 listener，退出时调用 stop() 刷新剩余日志
+    """
+    level = os.environ.get("CAR_LOG_LEVEL", "WARNING").upper()
+
+    log_q = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_q))
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    ))
+    listener = logging.handlers.QueueListener(log_q, stream)
+    listener.start()
+    return listener
+
+
 # ========== 占位电机驱动接口（部署时替换） ==========
 def drive_motor(left, right):
-    print(f"[DRIVE] L={left:.2f}  R={right:.2f}")
+    logger.info("[DRIVE] L=%.2f  R=%.2f", left, right)
+
+
+class _LatestSlot:
+    """
+    单槽“最新值”：生产线程覆盖写，控制线程随时读
+    （CPython 下引用赋值是原子的，无需加锁）
+    """
+    __slots__ = ("v",)
+
+    def __init__(self):
+        self.v = None
+
+    def put(self, x):
+        self.v = x
+
+    def get(self):
+        return self.v
 
 
 class TrackSystem:
+    # 二维码结果超过该时长视为过期（丢失）
+    QR_STALE_S = 0.3
+    # 避障状态超过该时长未更新（测距线程卡死/退出）则强制停车
+    OBSTACLE_STALE_S = 0.3
+    # 超声波测距周期（HC-SR04 建议不低于 60ms）
+    OBSTACLE_PERIOD_S = 0.06
+    # 控制循环周期
+    CONTROL_PERIOD_S = 0.02
+
     def __init__(self):
-        self.camera = CameraModule()
+        # 二维码检测只需亮度，直接采集 Y 平面，省去 BGR 转换与灰度化
+        self.camera = CameraModule(gray=True)
         self.qr = QRDetector()
         self.obstacle = ObstacleSensor()
         self.motion = MotionController()
 
         self.last_valid_qr = None
 
-    def run(self):
-        self.camera.open()
+        self.qr_slot = _LatestSlot()
+        self.obst_slot = _LatestSlot()
+        self._stop = threading.Event()
 
+    # ---- 生产线程：二维码识别 ----
+    def _qr_worker(self):
         try:
             for frame in self.camera.frames():
+                if self._stop.is_set():
+                    break
+                try:
+                    qr_state = self.qr.detect(frame)
+                except Exception:
+                    logger.exception("二维码识别异常")
+                    continue
+                self.qr_slot.put((qr_state, time.monotonic()))
+        except Exception:
+            # 采集线程异常退出：结果随之过期，控制循环按丢失处理
+            logger.exception("二维码线程退出")
+
+    # ---- 生产线程：超声波避障 ----
+    def _obstacle_worker(self):
+        while not self._stop.is_set():
+            try:
+                self.obst_slot.put((self.obstacle.update(), time.monotonic()))
+            except Exception:
+                logger.exception("避障状态更新异常")
+            time.sleep(self.OBSTACLE_PERIOD_S)
+
+    def _latest_qr(self):
+        res = self.qr_slot.get()
+        if res is None:
+            return {"lost": True}
+
+        qr_state, stamp = res
+        if time.monotonic() - stamp > self.QR_STALE_S:
+            return {"lost": True}
+        return qr_state
+
+    def _latest_obstacle(self):
+        res = self.obst_slot.get()
+        if res is not None:
+            obst_state, stamp = res
+            if time.monotonic() - stamp <= self.OBSTACLE_STALE_S:
+                return obst_state
+
+        # 没有新鲜的测距结果不能继续行驶
+        return dict(
+            obstacle_near=False,
+            need_stop=True,
+            avoid_mode=True,
+            phase="STALE",
+            action="stop",
+            distance_cm=None
+        )
 
+    def run(self):
+        self.camera.open()
+        self._stop.clear()
+
+        # 先同步测一次，保证控制循环启动时已有避障状态
+        self.obst_slot.put((self.obstacle.update(), time.monotonic()))
+
+        workers = [
+            threading.Thread(target=self._qr_worker, daemon=True),
+            threading.Thread(target=self._obstacle_worker, daemon=True),
+        ]
+        for t in workers:
+            t.start()
+
+        try:
+            while True:
                 # ---- 避障状态 ----
-                obst_state = self.obstacle.update()
+                obst_state = self._latest_obstacle()
 
                 # ---- 二维码识别 ----
-                qr_state = self.qr.detect(frame)
+                qr_state = self._latest_qr()
 
                 # 丢失时保持最近目标参数
                 if qr_state.get("lost", False):
                     if self.last_valid_qr is not None:
-                        qr_state = self.last_valid_qr
-                        qr_state["lost"] = True
+                        qr_state = dict(self.last_valid_qr, lost=True)
                 else:
                     self.last_valid_qr = qr_state
 
@@ -68,13 +194,18 @@ class TrackSystem:
                 drive_motor(motion["left_speed"], motion["right_speed"])
 
                 # 控制循环频率（与摄像头 FPS 解耦）
-                time.sleep(0.02)
+                time.sleep(self.CONTROL_PERIOD_S)
 
         finally:
+            self._stop.set()
             self.camera.close()
 
 
 if __name__ == "__main__":
+    listener = setup_logging()
     system = TrackSystem()
     print("自动循迹系统启动...")
-    system.run()
\ No newline at end of file
+    try:
+        system.run()
+    finally:
+        listener.stop()
\ No newline at end of file